@@ -1,8 +1,9 @@
 import os
+import shlex
 import subprocess
-import json
-from typing import List, Dict, Any, Tuple
-from .utils import logger, get_pdf_filename, ensure_directory_exists
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from .utils import logger, get_pdf_filename, ensure_directory_exists, load_json
 
 def extract_pdf(pdf_file_path: str, output_base: str = "/kaggle/working") -> None:
     """
@@ -12,31 +13,72 @@ def extract_pdf(pdf_file_path: str, output_base: str = "/kaggle/working") -> Non
         pdf_file_path (str): Path to the input PDF file.
         output_base (str): Base directory to save outputs.
     """
-    cmd = f"mineru -p {pdf_file_path} -o {output_base} --source local"
-    logger.info(f"Running: {cmd}")
-    subprocess.run(cmd, shell=True, check=True)
+    cmd = ["mineru", "-p", pdf_file_path, "-o", output_base, "--source", "local"]
+    logger.info(f"Running: {shlex.join(cmd)}")
+    subprocess.run(cmd, check=True)
 
-def split_chunks_by_title(data: List[Dict[str, Any]], max_chunk_len: int = 1000) -> List[str]:
+def extract_pdfs_parallel(pdf_file_paths: List[str], output_base: str = "/kaggle/working", max_workers: Optional[int] = None) -> None:
+    """
+    Extract several PDF files concurrently, one minerU process per file.
+    
+    Args:
+        pdf_file_paths (List[str]): Paths to the input PDF files.
+        output_base (str): Base directory to save outputs.
+        max_workers (int, optional): Maximum number of concurrent minerU processes.
+            Defaults to the number of CPUs.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    # Each worker only waits on its child process, so threads are enough
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(extract_pdf, path, output_base) for path in pdf_file_paths]
+        for future in futures:
+            future.result()
+
+def split_chunks_by_title(data: List[Dict[str, Any]], max_chunk_len: int = 1000, chunk_overlap: int = 50) -> List[str]:
     """
     Split content into chunks based on titles and maximum length.
     
+    Each titled section is split on paragraph, line and sentence boundaries
+    so chunks stay semantically coherent; reference lists are split line by line.
+    
     Args:
         data (List[Dict]): List of content items from JSON.
         max_chunk_len (int): Maximum length for each chunk.
+        chunk_overlap (int): Characters shared between consecutive chunks of a section,
+            capped at half of max_chunk_len.
     
     Returns:
         List[str]: List of text chunks.
     """
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=max_chunk_len,
+        # The splitter rejects an overlap larger than the chunk size
+        chunk_overlap=min(chunk_overlap, max_chunk_len // 2),
+        separators=["\n\n", "\n", ". ", " "],
+        # Keep each sentence's period on the sentence instead of the next chunk
+        keep_separator="end"
+    )
+
     chunks = []
     current_title = ""
+    is_reference = False
     current_chunk_texts = []
+    current_chunk_len = 0  # running sum of lengths in current_chunk_texts
     i = 0
 
+    # Read each entry's fields once up front; the loops below index these
+    # parallel lists instead of hashing into the entry dicts
+    types = [entry["type"] for entry in data]
+    levels = [entry.get("text_level") for entry in data]
+    texts = [entry.get("text", "").strip() for entry in data]
+
     def get_text_len(text_list: List[str]) -> int:
-        return sum(len(t.strip()) for t in text_list)
+        return sum(len(t) for t in text_list)
 
     def flush_chunk() -> None:
-        nonlocal current_chunk_texts
+        nonlocal current_chunk_len
         if not current_chunk_texts:
             return
 
@@ -44,7 +86,7 @@ def split_chunks_by_title(data: List[Dict[str, Any]], max_chunk_len: int = 1000)
         if not full_text:
             return
 
-        if "reference" in current_title.lower() or "tài liệu tham khảo" in current_title.lower():
+        if is_reference:
             lines = full_text.split("\n")
             buffer = []
             buffer_len = 0
@@ -62,64 +104,74 @@ def split_chunks_by_title(data: List[Dict[str, Any]], max_chunk_len: int = 1000)
             if buffer:
                 chunks.append(f"{current_title.strip()}\n" + "\n".join(buffer).strip())
         else:
-            chunks.append(f"{current_title.strip()}\n{full_text}")
+            for piece in text_splitter.split_text(full_text):
+                chunks.append(f"{current_title.strip()}\n{piece}")
 
         current_chunk_texts.clear()
+        current_chunk_len = 0
 
-    while i < len(data):
-        entry = data[i]
+    n = len(data)
+    while i < n:
+        entry_type = types[i]
         temp_texts = []
 
-        if entry["type"] == "text" and entry.get("text_level") == 1:
-            new_title = entry["text"].strip()
+        if entry_type == "text" and levels[i] == 1:
+            new_title = texts[i]
             i += 1
-            while i < len(data) and data[i].get("text_level") == 1:
-                new_title += "\n" + data[i]["text"].strip()
+            while i < n and levels[i] == 1:
+                new_title += "\n" + texts[i]
                 i += 1
             flush_chunk()
             current_title = new_title
+            title_lower = new_title.lower()
+            is_reference = "reference" in title_lower or "tài liệu tham khảo" in title_lower
             continue
 
-        if entry["type"] == "equation":
-            if i > 0 and data[i-1]["type"] == "text":
-                prev_text = data[i-1]["text"].strip()
+        if entry_type == "equation":
+            if i > 0 and types[i-1] == "text":
+                prev_text = texts[i-1]
                 if not current_chunk_texts or current_chunk_texts[-1] != prev_text:
                     temp_texts.append(prev_text)
-            temp_texts.append(entry["text"].strip())
-            if i + 1 < len(data) and data[i+1]["type"] == "text":
-                temp_texts.append(data[i+1]["text"].strip())
+            temp_texts.append(texts[i])
+            if i + 1 < n and types[i+1] == "text":
+                temp_texts.append(texts[i+1])
                 i += 1
 
-        elif entry["type"] == "text":
-            text = entry["text"].strip()
+        elif entry_type == "text":
+            text = texts[i]
             if text:
                 temp_texts.append(text)
 
         current_chunk_texts.extend(temp_texts)
+        current_chunk_len += get_text_len(temp_texts)
 
-        if get_text_len(current_chunk_texts) > max_chunk_len:
+        # Regular sections are accumulated whole and split in flush_chunk;
+        # reference lists keep the length-capped flush
+        if is_reference and current_chunk_len > max_chunk_len:
             j = i + 1
-            while j < len(data):
-                next_entry = data[j]
-                if next_entry.get("text_level") == 1:
+            while j < n:
+                if levels[j] == 1:
                     break
 
                 lookahead_temp = []
+                next_type = types[j]
 
-                if next_entry["type"] == "equation":
-                    if j > 0 and data[j-1]["type"] == "text":
-                        prev_text = data[j-1]["text"].strip()
+                if next_type == "equation":
+                    if j > 0 and types[j-1] == "text":
+                        prev_text = texts[j-1]
                         if not current_chunk_texts or current_chunk_texts[-1] != prev_text:
                             lookahead_temp.append(prev_text)
-                    lookahead_temp.append(next_entry["text"].strip())
-                    if j + 1 < len(data) and data[j+1]["type"] == "text":
-                        lookahead_temp.append(data[j+1]["text"].strip())
+                    lookahead_temp.append(texts[j])
+                    if j + 1 < n and types[j+1] == "text":
+                        lookahead_temp.append(texts[j+1])
                         j += 1
-                elif next_entry["type"] == "text":
-                    lookahead_temp.append(next_entry["text"].strip())
+                elif next_type == "text":
+                    lookahead_temp.append(texts[j])
 
-                if get_text_len(lookahead_temp) + get_text_len(current_chunk_texts) <= max_chunk_len:
+                lookahead_len = get_text_len(lookahead_temp)
+                if lookahead_len + current_chunk_len <= max_chunk_len:
                     current_chunk_texts.extend(lookahead_temp)
+                    current_chunk_len += lookahead_len
                     j += 1
                     i = j
                 else:
@@ -132,6 +184,44 @@ def split_chunks_by_title(data: List[Dict[str, Any]], max_chunk_len: int = 1000)
     flush_chunk()
     return chunks
 
+def _make_doc_ids(n: int) -> List[str]:
+    """Generate `n` random 128-bit hex document IDs from a single urandom read."""
+    raw = os.urandom(16 * n)
+    return [raw[k:k + 16].hex() for k in range(0, 16 * n, 16)]
+
+def _parse_gemini_summary(response: str, description_key: str, caption_key: str) -> Tuple[str, str]:
+    """Extract the description and short caption lines from a Gemini summary."""
+    description = ""
+    short_caption = ""
+    for line in response.splitlines():
+        if line.startswith(description_key):
+            description = line.replace(description_key, "").strip()
+        elif line.startswith(caption_key):
+            short_caption = line.replace(caption_key, "").strip()
+    return description, short_caption
+
+def _summarize_image_item(image_path: str, caption: str) -> Tuple[str, str]:
+    """Summarize one image, returning (description, short caption)."""
+    from .slide_generator import summarize_image_with_gemini
+
+    try:
+        response = summarize_image_with_gemini(image_path, caption)
+        return _parse_gemini_summary(response, "**Image Description**:", "**Image Caption**:")
+    except Exception as e:
+        logger.error(f"Error processing image: {e}")
+        return str(e), ""
+
+def _summarize_table_item(caption: str, table_html: str) -> Tuple[str, str]:
+    """Summarize one table, returning (description, short caption)."""
+    from .slide_generator import summarize_table_with_gemini
+
+    try:
+        response = summarize_table_with_gemini(caption, table_html)
+        return _parse_gemini_summary(response, "**Table Description**:", "**Table Caption**:")
+    except Exception as e:
+        logger.error(f"Error processing table: {e}")
+        return str(e), ""
+
 def process_json_data(content_list_json: str, images_root: str) -> Tuple[List[Dict[str, Any]], List[str], List[str]]:
     """
     Process JSON data and generate summaries for images and tables.
@@ -146,65 +236,39 @@ def process_json_data(content_list_json: str, images_root: str) -> Tuple[List[Di
         - List of image captions
         - List of table captions
     """
-    from .slide_generator import summarize_image_with_gemini, summarize_table_with_gemini
-    import uuid
     from langchain.schema import Document
+    from .slide_generator import GEMINI_MAX_CONCURRENCY
+
+    data = []
+    image_futures = []
+    table_futures = []
+    # Image and table summaries share the Gemini concurrency limit
+    with ThreadPoolExecutor(max_workers=GEMINI_MAX_CONCURRENCY) as executor:
+        # Partition images and tables in a single pass, starting their
+        # summaries while the rest of the file is still being parsed
+        for item in load_json(content_list_json, stream=True):
+            data.append(item)
+            item_type = item['type']
+            if item_type == 'image':
+                full_path = os.path.join(images_root, item['img_path'])
+                image_futures.append(executor.submit(_summarize_image_item, full_path, item.get('img_caption', '')))
+            elif item_type == 'table':
+                table_futures.append(executor.submit(_summarize_table_item, item.get('table_caption', ''), item['table_body']))
+
+        chunks = split_chunks_by_title(data)
+        image_results = [future.result() for future in image_futures]
+        table_results = [future.result() for future in table_futures]
 
-    with open(content_list_json, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    chunks = split_chunks_by_title(data)
-
-    # Process images
-    image_summaries = []
-    image_captions = []
-    for item in data:
-        if item['type'] == 'image':
-            full_path = os.path.join(images_root, item['img_path'])
-            caption = item.get('img_caption', '')
-            try:
-                response = summarize_image_with_gemini(full_path, caption)
-                description = ""
-                short_caption = ""
-                for line in response.splitlines():
-                    if line.startswith("**Image Description**:"):
-                        description = line.replace("**Image Description**:", "").strip()
-                    elif line.startswith("**Image Caption**:"):
-                        short_caption = line.replace("**Image Caption**:", "").strip()
-                image_summaries.append(description)
-                image_captions.append(short_caption)
-            except Exception as e:
-                logger.error(f"Error processing image: {e}")
-                image_summaries.append(str(e))
-                image_captions.append("")
-
-    # Process tables
-    table_summaries = []
-    table_captions = []
-    for item in data:
-        if item['type'] == 'table':
-            caption = item.get('table_caption', '')
-            html = item['table_body']
-            try:
-                response = summarize_table_with_gemini(caption, html)
-                description = ""
-                short_caption = ""
-                for line in response.splitlines():
-                    if line.startswith("**Table Description**:"):
-                        description = line.replace("**Table Description**:", "").strip()
-                    elif line.startswith("**Table Caption**:"):
-                        short_caption = line.replace("**Table Caption**:", "").strip()
-                table_summaries.append(description)
-                table_captions.append(short_caption)
-            except Exception as e:
-                logger.error(f"Error processing table: {e}")
-                table_summaries.append(str(e))
-                table_captions.append("")
+    image_summaries = [description for description, _ in image_results]
+    image_captions = [short_caption for _, short_caption in image_results]
+    table_summaries = [description for description, _ in table_results]
+    table_captions = [short_caption for _, short_caption in table_results]
 
     def create_summary_documents(summaries: List[str], data_type: str) -> List[Document]:
+        doc_ids = _make_doc_ids(len(summaries))
         return [
-            Document(page_content=summary, metadata={"type": data_type, "doc_id": str(uuid.uuid4())})
-            for summary in summaries
+            Document(page_content=summary, metadata={"type": data_type, "doc_id": doc_id})
+            for summary, doc_id in zip(summaries, doc_ids)
         ]
 
     text_summary_docs = create_summary_documents(chunks, "text_summary")
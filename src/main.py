@@ -1,4 +1,5 @@
 import os
+import logging
 import argparse
 from typing import Optional
 from .utils import setup_directories, logger, get_pdf_filename
@@ -57,6 +58,12 @@ def process_pdf_to_slides(
     return output_file
 
 def main():
+    # Configure logging here rather than at import, so importing src leaves the root logger alone
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
     parser = argparse.ArgumentParser(description="Convert PDF to presentation slides")
     parser.add_argument("pdf_path", help="Path to the input PDF file")
     parser.add_argument("--output-dir", help="Directory to save output files")
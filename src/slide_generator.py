@@ -1,69 +1,181 @@
 import os
 import re
 import time
-from typing import List, Dict, Any, Optional
-from PIL import Image
+import asyncio
+import hashlib
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set, Tuple
 from google import genai
+from google.genai import errors, types
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN
-from .utils import logger, ensure_directory_exists
+from .utils import logger, ensure_directory_exists, load_json, save_json
 
 # Initialize Gemini client
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "YOUR_GEMINI_API_KEY")
 client = genai.Client(api_key=GEMINI_API_KEY)
+GEMINI_MODEL = "gemini-2.0-flash"
+
+# Reference annotations emitted by the summarization prompts
+_EQ_RE = re.compile(r'\(Equation:\s*([^)]+)\)')
+# Image and table references share one pattern; both resolve through image_lookup
+_REF_RE = re.compile(r'\((?:Image|Table):\s*([^)]+)\)')
+
+# Slide layout lengths; pptx lengths are immutable ints, so build them once
+_MARGIN_LEFT = Inches(0.5)
+_TITLE_TOP = Inches(0.2)
+_TITLE_WIDTH = Inches(9)
+_TITLE_HEIGHT = Inches(1)
+_TITLE_FONT_SIZE = Pt(36)
+_BODY_TOP = Inches(1)
+_BODY_WIDTH = Inches(8.5)
+_BODY_HEIGHT = Inches(5)
+_SPLIT_BODY_WIDTH = Inches(4.3)
+_IMAGE_LEFT = Inches(5.3)
+_IMAGE_WIDTH = Inches(4)
+_CAPTION_HEIGHT = Inches(0.6)
+_CAPTION_FONT_SIZE = Pt(12)
+_BULLET_HEIGHT = Inches(1)
+_BULLET_SPACING = Inches(0.2)
+_BULLET_FONT_SIZE = Pt(16)
+_MAX_EQUATION_WIDTH = Inches(3.5)
+
+# Rate-limited (HTTP 429) calls are retried with exponential back-off
+GEMINI_MAX_RETRIES = 5
+GEMINI_BACKOFF_SECONDS = 2.0
+GEMINI_MAX_CONCURRENCY = 8
+
+def _backoff_delay(error: Exception, attempt: int) -> Optional[float]:
+    """Seconds to wait before retrying `error`, or None if it should be raised."""
+    if not isinstance(error, errors.APIError) or error.code != 429:
+        return None
+    if attempt >= GEMINI_MAX_RETRIES:
+        return None
+    return GEMINI_BACKOFF_SECONDS * 2 ** attempt
+
+def _generate_content(contents: Any) -> str:
+    """Call Gemini and return the stripped response text."""
+    attempt = 0
+    while True:
+        try:
+            response = client.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=contents
+            )
+            return response.text.strip()
+        except Exception as e:
+            delay = _backoff_delay(e, attempt)
+            if delay is None:
+                raise
+            logger.warning(f"Gemini rate limit hit, retrying in {delay:.0f}s")
+            time.sleep(delay)
+            attempt += 1
+
+async def _generate_content_async(contents: Any) -> str:
+    """Async variant of _generate_content using the aio client."""
+    attempt = 0
+    while True:
+        try:
+            response = await client.aio.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=contents
+            )
+            return response.text.strip()
+        except Exception as e:
+            delay = _backoff_delay(e, attempt)
+            if delay is None:
+                raise
+            logger.warning(f"Gemini rate limit hit, retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+# Responses are cached on disk so re-processing the same paper skips the API
+GEMINI_CACHE_DIR = os.getenv("GEMINI_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "soict_rag"))
+
+def _cache_key(*parts: bytes) -> str:
+    """Build a cache key from the model name and the request content."""
+    digest = hashlib.sha256(GEMINI_MODEL.encode("utf-8"))
+    for part in parts:
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()
+
+def _load_cached_response(key: str) -> Optional[str]:
+    """Return a cached Gemini response, or None on a cache miss."""
+    try:
+        return load_json(os.path.join(GEMINI_CACHE_DIR, f"{key}.json"))["text"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+def _store_cached_response(key: str, text: str) -> None:
+    """Write a Gemini response to the cache; save_json replaces the file atomically."""
+    path = os.path.join(GEMINI_CACHE_DIR, f"{key}.json")
+    try:
+        ensure_directory_exists(path)
+        save_json({"text": text}, path)
+    except OSError as e:
+        logger.warning(f"Could not write Gemini cache entry {key}: {e}")
+
+def _generate_cached(key_parts: List[bytes], contents: Any) -> str:
+    """Call Gemini, reusing the cached response for an identical request."""
+    key = _cache_key(*key_parts)
+    cached = _load_cached_response(key)
+    if cached is not None:
+        return cached
+
+    text = _generate_content(contents)
+    _store_cached_response(key, text)
+    return text
+
+# Fixed instructions go first in every prompt so Gemini's implicit prefix
+# cache can reuse them; per-call content (captions, text, HTML) goes last.
+_IMAGE_INSTRUCTION = (
+    "The image below is from a scientific paper, and its caption (if existed) follows the image.\n\n"
+    "Based on both the visual content and the caption if existed, write a detailed but concise description of the image. "
+    "Keep the description within 100 words maximum. Use a neutral academic tone.\n\n"
+    "Then, generate a very short image caption (one single sentence, 5–15 words) for displaying below the image in a slide. "
+    "The short caption must be included even if you are unsure. Do not skip it.\n\n"
+    "Return the result in the following format exactly:\n"
+    "**Image Description**: <your detailed description here>\n"
+    "**Image Caption**: <your short caption here>"
+)
+
+_TABLE_INSTRUCTION = (
+    "You are an assistant tasked with analyzing and summarizing tables from scientific papers. "
+    "An HTML table and its caption (if existed) are given at the end of this message.\n\n"
+    "Analyze the table and provide a concise summary of the main results, explicitly including key numerical values. "
+    "Highlight which methods performed better on each dataset (TotalText and CTW-1500) based on recall (R), precision (P), and H-mean (H). "
+    "When identifying the best-performing methods, include the actual metric values (e.g., 'CRAFT achieved the highest recall of 85.3% on CTW-1500'). "
+    "Use a clear and objective academic tone. Do not restate the caption.\n\n"
+    "After the description, generate a a **very short, concise table caption (one single sentence, 5–15 words) that clearly summarizes the key insight of the table.\n\n"
+    "Return the result in the following format:\n"
+    "**Table Description**: <your detailed table analysis here>\n"
+    "**Table Caption**: <your concise caption here>"
+)
 
 def summarize_image_with_gemini(image_path: str, caption: str) -> str:
     """Summarize an image using Gemini."""
-    with Image.open(image_path) as image:
-        prompt = (
-            f"The following image is from a scientific paper, and the caption if existed is:\n\n"
-            f"{caption}\n\n"
-            "Based on both the visual content and the caption if existed, write a detailed but concise description of the image. "
-            "Keep the description within 100 words maximum. Use a neutral academic tone.\n\n"
-            "Then, generate a very short image caption (one single sentence, 5–15 words) for displaying below the image in a slide. "
-            "The short caption must be included even if you are unsure. Do not skip it.\n\n"
-            "Return the result in the following format exactly:\n"
-            "**Image Description**: <your detailed description here>\n"
-            "**Image Caption**: <your short caption here>"
-        )
-
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=[image, prompt]
-        )
-        return response.text.strip()
+    caption_part = f"Caption: {caption}"
+    # Send the encoded file as-is; Gemini decodes it server-side
+    image_bytes = Path(image_path).read_bytes()
+    mime_type = mimetypes.guess_type(image_path)[0] or "image/png"
+    image_part = types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
+    return _generate_cached(
+        [_IMAGE_INSTRUCTION.encode("utf-8"), image_bytes, caption_part.encode("utf-8")],
+        [_IMAGE_INSTRUCTION, image_part, caption_part]
+    )
 
 def summarize_table_with_gemini(caption: str, table_html: str) -> str:
     """Summarize a table using Gemini."""
-    prompt = (
-        f"You are an assistant tasked with analyzing and summarizing tables from scientific papers. "
-        f"The following is an HTML table and its caption (if existed).\n\n"
-        f"Table Caption: {caption}\n"
-        f"Table Data (HTML):\n{table_html}\n\n"
-        "Analyze the table and provide a concise summary of the main results, explicitly including key numerical values. "
-        "Highlight which methods performed better on each dataset (TotalText and CTW-1500) based on recall (R), precision (P), and H-mean (H). "
-        "When identifying the best-performing methods, include the actual metric values (e.g., 'CRAFT achieved the highest recall of 85.3% on CTW-1500'). "
-        "Use a clear and objective academic tone. Do not restate the caption.\n\n"
-        "After the description, generate a a **very short, concise table caption (one single sentence, 5–15 words) that clearly summarizes the key insight of the table.\n\n"
-        "Return the result in the following format:\n"
-        "**Table Description**: <your detailed table analysis here>\n"
-        "**Table Caption**: <your concise caption here>"
-    )
-    response = client.models.generate_content(
-        model="gemini-2.0-flash",
-        contents=[prompt]
+    prompt = _TABLE_INSTRUCTION + (
+        f"\n\nTable Caption: {caption}\n"
+        f"Table Data (HTML):\n{table_html}"
     )
-    return response.text.strip()
-
-def prompt_ver1(text: str, equations: List[Dict[str, str]]) -> str:
-    """Generate prompt for version 1 summarization."""
-    eq_list = "\n".join([
-        f"- {eq.get('equation_markdown', '')} (filename: {eq.get('src', '')}"
-        for eq in equations
-    ]) if equations else "[None]"
+    return _generate_cached([prompt.encode("utf-8")], [prompt])
 
-    return f"""
+_BLOCK_INSTRUCTION_V1 = """
         You are a scientific assistant helping to summarize and organize technical research documents.
 
         Your task:
@@ -92,43 +204,9 @@ def prompt_ver1(text: str, equations: List[Dict[str, str]]) -> str:
         Do NOT include any titles, explanations, or extra text.
 
         ---
+"""
 
-        **Raw Text:**
-        {text.strip()}
-
-        ---
-
-        **Equations:**
-        {eq_list}
-
-        Write concise summary bullets now, annotated with equations where appropriate.
-        """
-
-def prompt_ver2(text: str, equations: List[Dict[str, str]], images: List[Dict[str, str]]) -> str:
-    """Generate prompt for version 2 summarization."""
-    eq_list = "\n".join([
-        f"- {eq.get('equation_markdown', '')} (filename: {eq.get('src', '')}"
-        for eq in equations
-    ]) if equations else "[None]"
-
-    max_section = len(images) + 1
-
-    figure_list = []
-    table_list = []
-    for img in images:
-        alt = img.get("alt", "")
-        name = img.get("src", "")
-        caption = img.get("caption", "").strip()
-        item_str = f"(Caption: {caption}) - (Filename: {name})"
-        if alt.lower() == "table":
-            table_list.append(item_str)
-        else:
-            figure_list.append(item_str)
-
-    img_list = "\n".join(figure_list) if figure_list else "[None]"
-    table_list_str = "\n".join(table_list) if table_list else "[None]"
-
-    return f"""
+_BLOCK_INSTRUCTION_V2 = """
         You are a scientific assistant helping to summarize and organize technical research documents.
 
         Your task is as follows:
@@ -147,7 +225,7 @@ def prompt_ver2(text: str, equations: List[Dict[str, str]], images: List[Dict[st
         - Each section should have a header: `### Section N: Title of section`
         - Each section can have **up to 5 bullets**.
         - Each section can reference **at most 2 visuals** (images or tables).
-        - The **total number of sections must not exceed {max_section}**.
+        - The **total number of sections must not exceed the Maximum Sections value given below**.
 
         3. **Annotate** each bullet with any clearly related visual or equation:
         - Use format: `(Image: figure1.png, figure2.jpg) or (Table: table1.png) or (Equation: 1.png)`
@@ -167,8 +245,57 @@ def prompt_ver2(text: str, equations: List[Dict[str, str]], images: List[Dict[st
         - Each bullet must be a standalone factual summary.
         - Do not reuse or rephrase raw text — rewrite clearly.
         - Do not invent filenames or captions.
-        - Do not add more than {max_section} sections.
+        - Do not add more sections than the Maximum Sections value.
+
+"""
+
+def prompt_ver1(text: str, equations: List[Dict[str, str]]) -> str:
+    """Generate prompt for version 1 summarization."""
+    eq_list = "\n".join([
+        f"- {eq.get('equation_markdown', '')} (filename: {eq.get('src', '')}"
+        for eq in equations
+    ]) if equations else "[None]"
+
+    return _BLOCK_INSTRUCTION_V1 + f"""
+        **Raw Text:**
+        {text.strip()}
+
+        ---
+
+        **Equations:**
+        {eq_list}
 
+        Write concise summary bullets now, annotated with equations where appropriate.
+        """
+
+def prompt_ver2(text: str, equations: List[Dict[str, str]], images: List[Dict[str, str]]) -> str:
+    """Generate prompt for version 2 summarization."""
+    eq_list = "\n".join([
+        f"- {eq.get('equation_markdown', '')} (filename: {eq.get('src', '')}"
+        for eq in equations
+    ]) if equations else "[None]"
+
+    max_section = len(images) + 1
+
+    figure_list = []
+    table_list = []
+    for img in images:
+        alt = img.get("alt", "")
+        name = img.get("src", "")
+        caption = img.get("caption", "").strip()
+        item_str = f"(Caption: {caption}) - (Filename: {name})"
+        if alt.lower() == "table":
+            table_list.append(item_str)
+        else:
+            figure_list.append(item_str)
+
+    img_list = "\n".join(figure_list) if figure_list else "[None]"
+    table_list_str = "\n".join(table_list) if table_list else "[None]"
+
+    return _BLOCK_INSTRUCTION_V2 + f"""
+        **Maximum Sections:** {max_section}
+
+        ---
 
         **Raw Text:**
         {text.strip()}
@@ -193,6 +320,46 @@ def prompt_ver2(text: str, equations: List[Dict[str, str]], images: List[Dict[st
         Now write the summary bullets, organized by section, and annotate related visuals/equations accordingly.
         """
 
+def _build_block_prompt(block: Dict[str, Any], text: str) -> Tuple[str, bool]:
+    """Pick prompt_ver1 or prompt_ver2 for a block; the flag is True for ver2."""
+    num_images = len(block.get('images', []))
+    num_equations = len(block.get('equations', []))
+
+    if num_images > 2 or num_equations > 3:
+        prompt = prompt_ver2(
+            text=text,
+            equations=block.get("equations", []),
+            images=block.get("images", [])
+        )
+        return prompt, True
+
+    prompt = prompt_ver1(
+        text=text,
+        equations=block.get("equations", [])
+    )
+    return prompt, False
+
+def _block_summaries(block: Dict[str, Any], summarized: str, sectioned: bool) -> List[Dict[str, Any]]:
+    """Turn a Gemini summary into the slide blocks for one input block."""
+    if sectioned:
+        return parse_summary_into_sections(summarized, block)
+
+    return [{
+        "heading": block["heading"],
+        "text": summarized,
+        "equations": block.get("equations", []),
+        "images": block.get("images", [])
+    }]
+
+def _failed_block_summary(block: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Placeholder slide block used when summarization fails."""
+    return [{
+        "heading": block["heading"],
+        "text": "[Summary failed]",
+        "equations": block.get("equations", []),
+        "images": block.get("images", [])
+    }]
+
 def summarize_block(block: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Summarize a single block using either prompt_ver1 or prompt_ver2."""
     text = block['text'].strip()
@@ -201,66 +368,72 @@ def summarize_block(block: Dict[str, Any]) -> List[Dict[str, Any]]:
         return []
 
     logger.info(f"Summarizing block — {block['heading'][:30]}...")
-    block_summaries = []
 
-    num_images = len(block.get('images', []))
-    num_equations = len(block.get('equations', []))
-    
     try:
-        if num_images > 2 or num_equations > 3:
-            prompt = prompt_ver2(
-                text=text,
-                equations=block.get("equations", []),
-                images=block.get("images", [])
-            )
-            response = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=prompt
-            )
-            summarized = response.text.strip()
-            
-            sections = parse_summary_into_sections(summarized, block)
-            block_summaries.extend(sections)
-            
-        else:
-            prompt = prompt_ver1(
-                text=text,
-                equations=block.get("equations", [])
-            )
-            
-            response = client.models.generate_content(
-                model="gemini-2.0-flash", 
-                contents=prompt
-            )
-            time.sleep(2)
-            summarized = response.text.strip()
-            
-            summary_block = {
-                "heading": block["heading"],
-                "text": summarized,
-                "equations": block.get("equations", []),
-                "images": block.get("images", [])
-            }
-            block_summaries.append(summary_block)
-
-        logger.info("Done summarizing block")
-        return block_summaries
+        prompt, sectioned = _build_block_prompt(block, text)
+        summarized = _generate_content(prompt)
+        block_summaries = _block_summaries(block, summarized, sectioned)
+    except Exception as e:
+        logger.error(f"Error summarizing block: {e}")
+        return _failed_block_summary(block)
+
+    logger.info("Done summarizing block")
+    return block_summaries
+
+def summarize_blocks(blocks: List[Dict[str, Any]], max_workers: int = GEMINI_MAX_CONCURRENCY) -> List[Dict[str, Any]]:
+    """Summarize blocks on a thread pool, returning slide blocks in input order."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(summarize_block, blocks))
+    return [summary for block_summaries in results for summary in block_summaries]
+
+async def summarize_block_async(block: Dict[str, Any], semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+    """Async variant of summarize_block; `semaphore` bounds concurrent Gemini calls."""
+    text = block['text'].strip()
+    if not text:
+        logger.info(f"Block ('{block['heading']}') is empty, skipping.")
+        return []
 
+    try:
+        prompt, sectioned = _build_block_prompt(block, text)
+        async with semaphore:
+            logger.info(f"Summarizing block — {block['heading'][:30]}...")
+            summarized = await _generate_content_async(prompt)
+        block_summaries = _block_summaries(block, summarized, sectioned)
     except Exception as e:
         logger.error(f"Error summarizing block: {e}")
-        return [{
-            "heading": block["heading"],
-            "text": "[Summary failed]",
-            "equations": block.get("equations", []),
-            "images": block.get("images", [])
-        }]
+        return _failed_block_summary(block)
+
+    logger.info("Done summarizing block")
+    return block_summaries
+
+async def summarize_blocks_async(
+    blocks: List[Dict[str, Any]],
+    max_concurrency: int = GEMINI_MAX_CONCURRENCY
+) -> List[Dict[str, Any]]:
+    """Summarize all blocks concurrently, returning slide blocks in input order."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    results = await asyncio.gather(
+        *(summarize_block_async(block, semaphore) for block in blocks),
+        return_exceptions=True
+    )
+
+    summaries = []
+    for block, result in zip(blocks, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Error summarizing block: {result}")
+            summaries.extend(_failed_block_summary(block))
+        else:
+            summaries.extend(result)
+    return summaries
 
 def parse_summary_into_sections(summarized_text: str, block: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Parse summarized text into sections."""
     sections = []
     current_section = None
     current_bullets = []
-    image_filenames = set()
+    # Referenced filenames in first-mention order, deduplicated via seen_filenames
+    image_filenames: List[str] = []
+    seen_filenames = set()
 
     image_lookup = {img["src"]: img for img in block.get("images", [])}
 
@@ -275,26 +448,22 @@ def parse_summary_into_sections(summarized_text: str, block: Dict[str, Any]) ->
                     "heading": heading,
                     "sub_heading": current_section,
                     "text": "\n".join(current_bullets).strip(),
-                    "images": [
-                        image_lookup[fname]
-                        for fname in sorted(image_filenames)
-                        if fname in image_lookup
-                    ]
+                    "images": [image_lookup[fname] for fname in image_filenames if fname in image_lookup]
                 })
 
             current_section = line.replace("###", "").strip()
             current_bullets = []
-            image_filenames = set()
+            image_filenames = []
+            seen_filenames = set()
 
         elif line.startswith("*"):
             content = line[1:].strip()
 
-            related_imgs = re.findall(r"\(Image: ([^)]+)\)", content)
-            related_tables = re.findall(r"\(Table: ([^)]+)\)", content)
-            image_filenames.update(related_imgs + related_tables)
-
-            clean_content = re.sub(r"\(Image: [^)]+\)", "", content)
-            clean_content = re.sub(r"\(Table: [^)]+\)", "", clean_content).strip()
+            for fname in _REF_RE.findall(content):
+                if fname not in seen_filenames:
+                    seen_filenames.add(fname)
+                    image_filenames.append(fname)
+            clean_content = _REF_RE.sub("", content).strip()
 
             current_bullets.append(clean_content)
 
@@ -303,11 +472,7 @@ def parse_summary_into_sections(summarized_text: str, block: Dict[str, Any]) ->
             "heading": heading,
             "sub_heading": current_section,
             "text": "\n".join(current_bullets).strip(),
-            "images": [
-                image_lookup[fname]
-                for fname in sorted(image_filenames)
-                if fname in image_lookup
-            ]
+            "images": [image_lookup[fname] for fname in image_filenames if fname in image_lookup]
         })
 
     return sections
@@ -323,85 +488,78 @@ def create_presentation(blocks: List[Dict[str, Any]], pdf_filename: str, output_
         slide.placeholders[1].text = subtitle
         slide.placeholders[1].text_frame.word_wrap = True
 
-    def add_vertical_layout_slide(title: str, text: str) -> None:
-        slide = prs.slides.add_slide(blank_slide_layout)
-        shapes = slide.shapes
+    def add_titled_slide(title: str):
+        shapes = prs.slides.add_slide(blank_slide_layout).shapes
 
-        title_box = shapes.add_textbox(Inches(0.5), Inches(0.2), Inches(9), Inches(1))
+        title_box = shapes.add_textbox(_MARGIN_LEFT, _TITLE_TOP, _TITLE_WIDTH, _TITLE_HEIGHT)
         tf = title_box.text_frame
         tf.clear()
-        tf.paragraphs[0].text = title
-        tf.paragraphs[0].font.size = Pt(36)
-        tf.paragraphs[0].font.bold = True
+        title_paragraph = tf.paragraphs[0]
+        title_paragraph.text = title
+        title_paragraph.font.size = _TITLE_FONT_SIZE
+        title_paragraph.font.bold = True
+        return shapes
 
-        left = Inches(0.5)
-        top = Inches(1)
-        width = Inches(8.5)
-        add_bullets_with_equations(shapes, left, top, width, text)
+    def add_contents_slide(title: str, text: str) -> None:
+        shapes = add_titled_slide(title)
+        content_box = shapes.add_textbox(_MARGIN_LEFT, _BODY_TOP, _BODY_WIDTH, _BODY_HEIGHT)
+        set_text_with_font(content_box.text_frame, text, 24)
 
-    def add_image_slide(title: str, text: str, images: List[Dict[str, str]]) -> None:
-        slide = prs.slides.add_slide(blank_slide_layout)
-        shapes = slide.shapes
-
-        title_box = shapes.add_textbox(Inches(0.5), Inches(0.2), Inches(9), Inches(1))
-        tf = title_box.text_frame
-        tf.clear()
-        tf.paragraphs[0].text = title
-        tf.paragraphs[0].font.size = Pt(36)
-        tf.paragraphs[0].font.bold = True
+    def add_vertical_layout_slide(title: str, text: str) -> None:
+        shapes = add_titled_slide(title)
+        add_bullets_with_equations(shapes, _MARGIN_LEFT, _BODY_TOP, _BODY_WIDTH, text)
 
-        left = Inches(0.5)
-        top = Inches(1)
-        width = Inches(4.3)
-        add_bullets_with_equations(shapes, left, top, width, text, max_image_width=Inches(3.5))
+    def add_image_slide(title: str, text: str, images: List[Dict[str, str]]) -> None:
+        shapes = add_titled_slide(title)
+        add_bullets_with_equations(shapes, _MARGIN_LEFT, _BODY_TOP, _SPLIT_BODY_WIDTH, text, max_image_width=_MAX_EQUATION_WIDTH)
 
         y = 1
         for img in images:
             path = img['path']
             caption = img.get('caption', '')
-            if not os.path.exists(path):
-                logger.warning(f"Image not found: {path}")
-                continue
-
-            pic = slide.shapes.add_picture(path, Inches(5.3), Inches(y), width=Inches(4))
+            pic = shapes.add_picture(path, _IMAGE_LEFT, Inches(y), width=_IMAGE_WIDTH)
             pic_height = pic.height.inches
 
             if caption:
                 caption_top = y + pic_height + 0.1
-                cap_box = slide.shapes.add_textbox(Inches(5.3), Inches(caption_top), Inches(4), Inches(0.6))
+                cap_box = shapes.add_textbox(_IMAGE_LEFT, Inches(caption_top), _IMAGE_WIDTH, _CAPTION_HEIGHT)
                 cap_tf = cap_box.text_frame
                 cap_tf.clear()
                 cap_tf.paragraphs[0].text = caption
-                cap_tf.paragraphs[0].font.size = Pt(12)
+                cap_tf.paragraphs[0].font.size = _CAPTION_FONT_SIZE
 
             y = y + pic_height + 0.5
 
+    image_dir = os.path.join("/kaggle/working", pdf_filename, "auto/images")
+    # Listed once, on the first block with images, instead of stat-ing every path
+    available_images: Optional[Set[str]] = None
+
     for i, block in enumerate(blocks):
         title = block.get('heading', '')
         text = block.get('text', '')
-        images = []
 
         if i == 0:
             add_title_slide(title, text)
         elif i == 1:
-            slide = prs.slides.add_slide(blank_slide_layout)
-            shapes = slide.shapes
-            title_box = shapes.add_textbox(Inches(0.5), Inches(0.2), Inches(9), Inches(1))
-            tf = title_box.text_frame
-            tf.clear()
-            tf.paragraphs[0].text = title
-            tf.paragraphs[0].font.size = Pt(36)
-            tf.paragraphs[0].font.bold = True
-
-            content_box = shapes.add_textbox(Inches(0.5), Inches(1), Inches(8.5), Inches(5))
-            set_text_with_font(content_box.text_frame, text, 24)
+            add_contents_slide(title, text)
+        elif not block.get('images'):
+            # Text-only blocks are the common case and never touch the image directory
+            add_vertical_layout_slide(title, text)
         else:
-            if block.get('images'):
-                for img in block['images']:
-                    filename = os.path.basename(img['src'])
-                    full_path = os.path.join("/kaggle/working", pdf_filename, "auto/images", filename)
-                    caption = img.get('caption', '')
-                    images.append({'path': full_path, 'caption': caption})
+            if available_images is None:
+                try:
+                    available_images = set(os.listdir(image_dir))
+                except OSError:
+                    available_images = set()
+
+            images = []
+            for img in block['images']:
+                filename = os.path.basename(img['src'])
+                full_path = os.path.join(image_dir, filename)
+                if filename not in available_images:
+                    logger.warning(f"Image not found: {full_path}")
+                    continue
+                images.append({'path': full_path, 'caption': img.get('caption', '')})
 
             if images:
                 add_image_slide(title, text, images)
@@ -416,28 +574,26 @@ def set_text_with_font(text_frame, text: str, font_size: int = 16, align: PP_ALI
     """Set text with specified font and alignment."""
     text_frame.word_wrap = True
     text_frame.clear()
+    size = Pt(font_size)
     for line in text.strip().splitlines():
         p = text_frame.add_paragraph()
         p.text = line
-        p.font.size = Pt(font_size)
+        p.font.size = size
         p.alignment = align
 
-def add_bullets_with_equations(shapes, left: float, top: float, width: float, text: str, max_image_width: float = Inches(3.5)) -> float:
+def add_bullets_with_equations(shapes, left: float, top: float, width: float, text: str, max_image_width: float = _MAX_EQUATION_WIDTH) -> float:
     """Add bullets with equations to slide."""
-    eq_pattern = re.compile(r'\(Equation:\s*([^\)]+)\)')
     current_top = top
-    bullet_height = Inches(1)
-    spacing = Inches(0.2)
 
     bullets = [line.strip() for line in text.split('\n') if line.strip()]
     for bullet in bullets:
-        eq_match = eq_pattern.search(bullet)
+        eq_match = _EQ_RE.search(bullet)
         eq_path = None
         if eq_match:
             eq_path = eq_match.group(1).strip()
-            bullet = eq_pattern.sub('', bullet).strip()
+            bullet = _EQ_RE.sub('', bullet).strip()
 
-        text_box = shapes.add_textbox(left, current_top, width, bullet_height)
+        text_box = shapes.add_textbox(left, current_top, width, _BULLET_HEIGHT)
         tf = text_box.text_frame
         tf.word_wrap = True
         tf.clear()
@@ -449,14 +605,13 @@ def add_bullets_with_equations(shapes, left: float, top: float, width: float, te
 
         p = tf.add_paragraph()
         p.text = bullet
-        p.font.size = Pt(16)
+        p.font.size = _BULLET_FONT_SIZE
 
-        current_top += bullet_height + spacing
+        current_top += _BULLET_HEIGHT + _BULLET_SPACING
 
         if eq_path and os.path.exists(eq_path):
             pic = shapes.add_picture(eq_path, left + (width - max_image_width) / 2, current_top, width=max_image_width)
-            pic_height = pic.height.inches
-            current_top += Inches(pic_height) + spacing
+            current_top += pic.height + _BULLET_SPACING
         elif eq_path:
             logger.warning(f"Equation image not found: {eq_path}")
 
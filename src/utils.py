@@ -1,65 +1,436 @@
 import os
+import sys
+import errno
+import itertools
 import logging
 import shutil
+import stat
+import threading
+import dataclasses
+from datetime import date, datetime, time
+from uuid import UUID
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
 import json
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # optional: streaming loads fall back to a full parse
+    ijson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed by save_binary/load_binary
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for ".zst" binary files
+    zstandard = None
+
 logger = logging.getLogger(__name__)
 
+def _make_dirs(directory: str) -> None:
+    """os.makedirs(exist_ok=True), with a single mkdir when the parent already exists."""
+    # Not cached across calls: the directory may be removed behind our back in a
+    # long-lived process. Batch callers like copy_files dedupe directories themselves.
+    try:
+        os.mkdir(directory)
+    except FileNotFoundError:
+        os.makedirs(directory, exist_ok=True)
+    except FileExistsError:
+        if not os.path.isdir(directory):
+            raise
+
+# Project directories, relative to the base path passed to setup_directories
+_DIR_SUFFIXES = (
+    ('raw', 'data/raw'),
+    ('processed', 'data/processed'),
+    ('output', 'data/output'),
+    ('chroma', 'chroma_db'),
+)
+
 def setup_directories(base_path: str) -> Dict[str, str]:
     """Create necessary directories for the project."""
-    dirs = {
-        'raw': os.path.join(base_path, 'data/raw'),
-        'processed': os.path.join(base_path, 'data/processed'),
-        'output': os.path.join(base_path, 'data/output'),
-        'chroma': os.path.join(base_path, 'chroma_db')
-    }
+    dirs = {key: os.path.join(base_path, suffix) for key, suffix in _DIR_SUFFIXES}
     
     for dir_path in dirs.values():
-        os.makedirs(dir_path, exist_ok=True)
+        _make_dirs(dir_path)
         logger.info(f"Created directory: {dir_path}")
     
     return dirs
 
+# fd-relative unlink/rmdir avoid re-resolving every entry's full path
+_HAS_FD_RELATIVE_REMOVE = (
+    hasattr(os, 'fwalk') and os.unlink in os.supports_dir_fd and os.rmdir in os.supports_dir_fd
+)
+
+def _rmtree_contents_scandir(path: str) -> None:
+    """Portable fallback for _rmtree_contents on platforms without os.fwalk."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            # DirEntry caches the file type, so no extra lstat per entry
+            if entry.is_dir(follow_symlinks=False):
+                _rmtree_contents_scandir(entry.path)
+                os.rmdir(entry.path)
+            else:
+                os.unlink(entry.path)
+
+def _rmtree_contents(path: str) -> None:
+    """Remove everything inside a directory while keeping the directory itself."""
+    if not _HAS_FD_RELATIVE_REMOVE:
+        _rmtree_contents_scandir(path)
+        return
+
+    for _, dirs, files, root_fd in os.fwalk(path, topdown=False):
+        for name in files:
+            os.unlink(name, dir_fd=root_fd)
+        for name in dirs:
+            try:
+                os.rmdir(name, dir_fd=root_fd)
+            except NotADirectoryError:
+                # fwalk lists symlinks to directories under dirs without following them
+                os.unlink(name, dir_fd=root_fd)
+
 def clean_directory(directory: str) -> None:
     """Clean a directory by removing all its contents."""
     if os.path.exists(directory):
-        shutil.rmtree(directory)
-        os.makedirs(directory)
+        # os.fwalk yields nothing for a file or a symlink, so reject them up front
+        if os.path.islink(directory) or not os.path.isdir(directory):
+            raise NotADirectoryError(errno.ENOTDIR, os.strerror(errno.ENOTDIR), directory)
+        _rmtree_contents(directory)
         logger.info(f"Cleaned directory: {directory}")
 
-def save_json(data: Any, filepath: str) -> None:
-    """Save data to a JSON file."""
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    logger.info(f"Saved JSON to: {filepath}")
-
-def load_json(filepath: str) -> Any:
-    """Load data from a JSON file."""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    logger.info(f"Loaded JSON from: {filepath}")
+# O_BINARY only exists (and matters) on Windows
+_O_BINARY = getattr(os, 'O_BINARY', 0)
+
+def _write_all(fd: int, data: bytes) -> None:
+    """Write all of `data`; os.write may write less than asked (e.g. >2 GiB on some platforms)."""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+def _write_bytes(filepath: str, payload: bytes, durable: bool = False) -> None:
+    """
+    Write bytes straight to a file descriptor, skipping Python's buffered I/O layer.
+
+    The data goes to a temporary file that then replaces `filepath`, so readers never
+    see a half-written file. With durable=True it is also fsynced before the rename,
+    and on POSIX the parent directory is fsynced after it so the rename is kept too.
+    """
+    tmp_path = f"{filepath}.tmp.{os.getpid()}.{threading.get_ident()}"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o644)
+    try:
+        try:
+            _write_all(fd, payload)
+            if durable:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    if durable and os.name == 'posix':
+        _fsync_directory(os.path.dirname(filepath) or '.')
+
+def _fsync_directory(directory: str) -> None:
+    """Flush a directory entry change, such as a rename, to disk."""
+    dir_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+def _json_default(obj: Any) -> Any:
+    """Convert objects neither encoder handles natively (Pydantic models, paths, arrays)."""
+    if hasattr(obj, 'model_dump'):
+        return obj.model_dump()
+    if isinstance(obj, Path):
+        return str(obj)
+    # orjson serializes the types below itself; only the stdlib fallback reaches them
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _dumps_stdlib(data: Any, indent: bool) -> bytes:
+    """Encode data with the stdlib json module, in the same layout as the orjson path."""
+    if indent:
+        text = json.dumps(data, ensure_ascii=False, indent=2, default=_json_default)
+    else:
+        text = json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+    return text.encode('utf-8')
+
+def save_json(data: Any, filepath: str, *, indent: bool = False, durable: bool = False) -> None:
+    """
+    Save data to a JSON file; pass indent=True for files meant to be read by people.
+
+    The file is replaced atomically. Pass durable=True to fsync it before the
+    rename, when the write must survive a power loss. When orjson is installed,
+    NaN and Infinity are written as null rather than the stdlib's NaN/Infinity.
+    """
+    payload = None
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            payload = orjson.dumps(data, default=_json_default, option=option)
+        except orjson.JSONEncodeError:
+            # e.g. ints beyond 64 bits, which the stdlib encoder still accepts
+            pass
+    if payload is None:
+        payload = _dumps_stdlib(data, indent)
+    _write_bytes(filepath, payload, durable)
+    logger.debug("Saved JSON to: %s", filepath)
+
+def save_json_many(
+    items: Iterable[Tuple[Any, str]],
+    *,
+    indent: bool = False,
+    durable: bool = False,
+    max_workers: Optional[int] = None
+) -> None:
+    """Save several (data, filepath) pairs concurrently; the first failure is re-raised."""
+    max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+    # os.write releases the GIL, so one file's disk I/O overlaps the next one's encoding
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(save_json, data, filepath, indent=indent, durable=durable) for data, filepath in items]
+        for future in futures:
+            future.result()
+
+def _not_an_array_error(filepath: str) -> ValueError:
+    """Error raised when load_json(stream=True) is pointed at a non-array file."""
+    return ValueError(f"Expected a top-level JSON array in {filepath}")
+
+def _invalid_json_error(filepath: str, error: Exception) -> ValueError:
+    """ValueError for an ijson parse failure, matching what json/orjson raise."""
+    return ValueError(f"Invalid JSON in {filepath}: {error}")
+
+def _yield_json_items(f: Any, events: Iterator[Any], filepath: str) -> Iterator[Any]:
+    """Yield array items from ijson parse events, closing `f` when done."""
+    with f:
+        try:
+            yield from ijson.items(events, 'item')
+        except ijson.JSONError as e:
+            raise _invalid_json_error(filepath, e) from e
+
+def _iter_json_array(filepath: str) -> Iterator[Any]:
+    """Return an iterator over the items of a top-level JSON array, parsed as they are read."""
+    f = open(filepath, 'rb')
+    try:
+        events = ijson.parse(f, use_float=True)
+        # Check the first event now, so a non-array fails here as in the non-streaming path
+        try:
+            first = next(events)
+        except ijson.JSONError as e:
+            raise _invalid_json_error(filepath, e) from e
+        if first[1] != 'start_array':
+            raise _not_an_array_error(filepath)
+    except BaseException:
+        f.close()
+        raise
+    return _yield_json_items(f, itertools.chain([first], events), filepath)
+
+def load_json(filepath: str, *, stream: bool = False) -> Any:
+    """
+    Load data from a JSON file.
+
+    With stream=True the file must hold a top-level array (ValueError otherwise),
+    and an iterator over its items is returned; items are parsed incrementally
+    when ijson is installed.
+    """
+    if stream and ijson is not None:
+        logger.debug("Streaming JSON from: %s", filepath)
+        return _iter_json_array(filepath)
+
+    raw = Path(filepath).read_bytes()
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    logger.debug("Loaded JSON from: %s", filepath)
+    if stream:
+        if not isinstance(data, list):
+            raise _not_an_array_error(filepath)
+        return iter(data)
     return data
 
+def _require_binary_deps(filepath: str) -> None:
+    """Raise ImportError if the packages needed to read or write `filepath` are missing."""
+    if msgpack is None:
+        raise ImportError("save_binary/load_binary require the 'msgpack' package")
+    if filepath.endswith('.zst') and zstandard is None:
+        raise ImportError(f"{filepath} is Zstandard-compressed; install the 'zstandard' package")
+
+def save_binary(data: Any, filepath: str) -> None:
+    """
+    Save data in MessagePack format for intermediate files only this pipeline reads.
+
+    A filepath ending in ".zst" is additionally compressed with Zstandard.
+    """
+    _require_binary_deps(filepath)
+    payload = msgpack.packb(data, use_bin_type=True)
+    if filepath.endswith('.zst'):
+        payload = zstandard.ZstdCompressor(level=3).compress(payload)
+    _write_bytes(filepath, payload)
+    logger.debug("Saved MessagePack to: %s", filepath)
+
+def load_binary(filepath: str) -> Any:
+    """Load data written by save_binary."""
+    _require_binary_deps(filepath)
+    payload = Path(filepath).read_bytes()
+    if filepath.endswith('.zst'):
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    data = msgpack.unpackb(payload, raw=False, strict_map_key=False)
+    logger.debug("Loaded MessagePack from: %s", filepath)
+    return data
+
+@lru_cache(maxsize=1024)
 def get_pdf_filename(pdf_path: str) -> str:
     """Extract filename without extension from PDF path."""
-    return os.path.splitext(os.path.basename(pdf_path))[0]
+    # Same result as splitext(basename(path))[0], in one slice
+    sep = pdf_path.rfind(os.sep)
+    if os.altsep:
+        sep = max(sep, pdf_path.rfind(os.altsep))
+    start = sep + 1
+    dot = pdf_path.rfind('.')
+    # Like splitext, a dot only starts the extension if a non-dot character precedes it
+    if dot > start and pdf_path[start:dot].lstrip('.'):
+        return pdf_path[start:dot]
+    return pdf_path[start:]
 
 def ensure_directory_exists(filepath: str) -> None:
     """Ensure the directory for a file exists."""
     directory = os.path.dirname(filepath)
     if directory:
-        os.makedirs(directory, exist_ok=True)
-        logger.info(f"Ensured directory exists: {directory}")
+        _make_dirs(directory)
+
+# errnos meaning a zero-copy mechanism is unsupported for these files, not an I/O failure
+_COPY_FALLBACK_ERRNOS = frozenset({
+    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.ENOTSOCK, errno.ENOTTY
+})
+
+# Linux ioctl that makes dst share src's extents (btrfs, XFS with reflink, ...)
+_FICLONE = getattr(fcntl, 'FICLONE', 0x40049409) if fcntl is not None and sys.platform.startswith('linux') else None
+
+def _copy_fd_data(src_fd: int, dst_fd: int) -> None:
+    """
+    Copy file data in the kernel where possible.
+
+    Tries a copy-on-write clone first, then copy_file_range, sendfile and
+    finally a plain read/write loop.
+    """
+    if _FICLONE is not None:
+        try:
+            fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+            return
+        except OSError as e:
+            if e.errno not in _COPY_FALLBACK_ERRNOS:
+                raise
+
+    blocksize = min(max(os.fstat(src_fd).st_size, 1 << 23), 1 << 30)
+    offset = 0
+
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while True:
+                copied = os.copy_file_range(src_fd, dst_fd, blocksize, offset)
+                if not copied:
+                    # Some filesystems report 0 without copying anything; like
+                    # shutil, only trust it as EOF once data has been copied
+                    if offset == 0:
+                        break
+                    return
+                offset += copied
+        except OSError as e:
+            if e.errno not in _COPY_FALLBACK_ERRNOS:
+                raise
+
+    if hasattr(os, 'sendfile'):
+        try:
+            while True:
+                copied = os.sendfile(dst_fd, src_fd, offset, blocksize)
+                if not copied:
+                    return
+                offset += copied
+        except OSError as e:
+            if e.errno not in _COPY_FALLBACK_ERRNOS:
+                raise
+
+    os.lseek(src_fd, offset, os.SEEK_SET)
+    while True:
+        chunk = os.read(src_fd, 1 << 20)
+        if not chunk:
+            return
+        _write_all(dst_fd, chunk)
+
+def copy_file(src: str, dst: str, *, ensure_parent: bool = True) -> None:
+    """
+    Copy a file from source to destination, preserving metadata like shutil.copy2.
+
+    Pass ensure_parent=False when the caller has already created the destination directory.
+    """
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+    if ensure_parent:
+        ensure_directory_exists(dst)
+
+    # O_NONBLOCK keeps a FIFO source from blocking the open; it is rejected below
+    src_fd = os.open(src, os.O_RDONLY | _O_BINARY | getattr(os, 'O_NONBLOCK', 0))
+    try:
+        src_stat = os.fstat(src_fd)
+        # Check the source before dst is opened with O_TRUNC, as shutil.copy2 does
+        if stat.S_ISDIR(src_stat.st_mode):
+            raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), src)
+        if not stat.S_ISREG(src_stat.st_mode):
+            raise shutil.SpecialFileError(f"{src!r} is not a regular file")
+        try:
+            dst_stat = os.stat(dst)
+        except FileNotFoundError:
+            pass
+        else:
+            if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+                raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+
+        dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _O_BINARY, 0o644)
+        try:
+            _copy_fd_data(src_fd, dst_fd)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+
+    shutil.copystat(src, dst)
+    logger.debug("Copied file: %s -> %s", src, dst)
+
+def copy_files(pairs: Iterable[Tuple[str, str]]) -> None:
+    """Copy (src, dst) pairs, creating each destination directory only once."""
+    by_directory: Dict[str, List[Tuple[str, str]]] = {}
+    for src, dst in pairs:
+        by_directory.setdefault(os.path.dirname(dst), []).append((src, dst))
 
-def copy_file(src: str, dst: str) -> None:
-    """Copy a file from source to destination."""
-    ensure_directory_exists(dst)
-    shutil.copy2(src, dst)
-    logger.info(f"Copied file: {src} -> {dst}") 
\ No newline at end of file
+    for directory, group in by_directory.items():
+        if directory:
+            _make_dirs(directory)
+        for src, dst in group:
+            copy_file(src, dst, ensure_parent=False)
@@ -1,28 +1,438 @@
 import os
+import errno
+import stat
+import asyncio
+import shutil
+import tempfile
 import pytest
+from pathlib import Path
 from src.main import process_pdf_to_slides
-from src.utils import setup_directories
+from src.data_processing import split_chunks_by_title
+from src import slide_generator
+from src.slide_generator import summarize_block, summarize_block_async, _failed_block_summary, parse_summary_into_sections, summarize_image_with_gemini, summarize_table_with_gemini
+from src.utils import setup_directories, save_json, save_json_many, load_json, save_binary, load_binary, clean_directory, ensure_directory_exists, copy_file, copy_files
 
 def test_setup_directories():
     """Test that directory setup works correctly"""
-    test_dir = "test_output"
-    dirs = setup_directories(test_dir)
-    
-    # Check that all required directories exist
-    assert os.path.exists(dirs['raw'])
-    assert os.path.exists(dirs['processed'])
-    assert os.path.exists(dirs['output'])
-    
-    # Clean up
-    for dir_path in dirs.values():
-        if os.path.exists(dir_path):
-            os.rmdir(dir_path)
-    if os.path.exists(test_dir):
-        os.rmdir(test_dir)
+    test_dir = tempfile.mkdtemp()
+    try:
+        dirs = setup_directories(test_dir)
+        
+        # Check that all required directories exist
+        assert os.path.exists(dirs['raw'])
+        assert os.path.exists(dirs['processed'])
+        assert os.path.exists(dirs['output'])
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
 
 def test_process_pdf_to_slides_invalid_pdf():
     """Test that processing an invalid PDF raises an error"""
     with pytest.raises(Exception):
         process_pdf_to_slides("nonexistent.pdf")
 
+def test_split_chunks_by_title_sections():
+    """Test splitter, reference-list and equation handling in split_chunks_by_title"""
+    pytest.importorskip("langchain_text_splitters")
+    sentences = " ".join(f"Sentence number {k} is here." for k in range(40))
+    data = [{"type": "text", "text": "Intro", "text_level": 1}, {"type": "text", "text": sentences}]
+    chunks = split_chunks_by_title(data, max_chunk_len=200, chunk_overlap=0)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        title, body = chunk.split("\n", 1)
+        assert title == "Intro"
+        assert len(body) <= 200
+        assert body.startswith("Sentence") and body.endswith(".")
+
+    refs = [f"[{k}] Author {k}. Some paper title." for k in range(10)]
+    data = [{"type": "text", "text": "References", "text_level": 1}]
+    data += [{"type": "text", "text": ref} for ref in refs]
+    chunks = split_chunks_by_title(data, max_chunk_len=100)
+    assert all(chunk.startswith("References\n") for chunk in chunks)
+    assert [line for chunk in chunks for line in chunk.split("\n")[1:]] == refs
+
+    data = [
+        {"type": "text", "text": "Method", "text_level": 1},
+        {"type": "text", "text": "Before"},
+        {"type": "equation", "text": "$$x=1$$"},
+        {"type": "text", "text": "After"},
+    ]
+    assert split_chunks_by_title(data) == ["Method\nBefore\n$$x=1$$\nAfter"]
+
+def test_split_chunks_by_title_small_max_chunk_len():
+    """Test that a max_chunk_len below the default overlap still splits"""
+    pytest.importorskip("langchain_text_splitters")
+    data = [{"type": "text", "text": "Intro", "text_level": 1}]
+    data += [{"type": "text", "text": "word " * 30}]
+    chunks = split_chunks_by_title(data, max_chunk_len=40)
+    assert len(chunks) > 1
+    assert all(len(chunk.split("\n", 1)[1]) <= 40 for chunk in chunks)
+
+def test_summarize_block_malformed_block_fails_softly():
+    """Test that a block whose prompt cannot be built yields the failure placeholder"""
+    images = [{"img_path": f"images/{i}.jpg", "caption": None} for i in range(3)]
+    block = {"heading": "Method", "text": "Some text", "equations": [], "images": images}
+
+    assert summarize_block(block) == _failed_block_summary(block)
+    assert asyncio.run(summarize_block_async(block, asyncio.Semaphore(1))) == _failed_block_summary(block)
+
+def test_parse_summary_into_sections_image_order():
+    """Test that images follow first-mention order, without duplicates or leftover references"""
+    block = {
+        "heading": "Results",
+        "images": [{"src": name, "caption": name} for name in ("a.png", "b.png", "c.png")],
+    }
+    summary = (
+        "### Section 1: Findings\n"
+        "* Accuracy improves (Image: b.png)\n"
+        "* Ablation results (Table:a.png)\n"
+        "* Accuracy again (Image:b.png) (Table: a.png)\n"
+        "### Section 2: Other\n"
+        "* Unknown figure (Image: missing.png)\n"
+    )
+
+    sections = parse_summary_into_sections(summary, block)
+
+    assert [section["sub_heading"] for section in sections] == ["Section 1: Findings", "Section 2: Other"]
+    assert [img["src"] for img in sections[0]["images"]] == ["b.png", "a.png"]
+    assert sections[0]["text"] == "Accuracy improves\nAblation results\nAccuracy again"
+    assert sections[1]["images"] == []
+    assert sections[1]["text"] == "Unknown figure"
+
+@pytest.fixture
+def gemini_calls(tmp_path, monkeypatch):
+    """Point the response cache at tmp_path and record calls that reach the client"""
+    calls = []
+
+    def fake_generate_content(model, contents):
+        calls.append(contents)
+        return type("Response", (), {"text": f"summary {len(calls)}"})()
+
+    monkeypatch.setattr(slide_generator, "GEMINI_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(slide_generator.client.models, "generate_content", fake_generate_content)
+    return calls
+
+def test_gemini_cache_hits_and_misses(tmp_path, gemini_calls):
+    """Test that identical requests are served from the cache and changed ones are not"""
+    assert summarize_table_with_gemini("Table 1", "<table></table>") == "summary 1"
+    assert summarize_table_with_gemini("Table 1", "<table></table>") == "summary 1"
+    assert len(gemini_calls) == 1
+
+    assert summarize_table_with_gemini("Table 2", "<table></table>") == "summary 2"
+    assert len(gemini_calls) == 2
+
+    image = tmp_path / "fig.png"
+    image.write_bytes(b"first image")
+    assert summarize_image_with_gemini(str(image), "Figure 1") == "summary 3"
+    assert summarize_image_with_gemini(str(image), "Figure 1") == "summary 3"
+    assert summarize_image_with_gemini(str(image), "Figure 2") == "summary 4"
+    image.write_bytes(b"second image")
+    assert summarize_image_with_gemini(str(image), "Figure 1") == "summary 5"
+    assert len(gemini_calls) == 5
+
+def test_gemini_cache_corrupt_entry_is_a_miss(tmp_path, gemini_calls):
+    """Test that an unreadable cache entry is ignored and rewritten"""
+    assert summarize_table_with_gemini("Table 1", "<table></table>") == "summary 1"
+    (entry,) = (tmp_path / "cache").iterdir()
+    entry.write_text("{not json")
+
+    assert summarize_table_with_gemini("Table 1", "<table></table>") == "summary 2"
+    assert summarize_table_with_gemini("Table 1", "<table></table>") == "summary 2"
+    assert len(gemini_calls) == 2
+
+def test_save_and_load_json_roundtrip(tmp_path):
+    """Test that JSON written by save_json is read back unchanged"""
+    data = {"title": "Tài liệu tham khảo", "chunks": ["a", "b"], "count": 2, "score": 0.5}
+    filepath = str(tmp_path / "chunks.json")
+
+    save_json(data, filepath)
+
+    assert load_json(filepath) == data
+
+def test_save_json_integer_beyond_64_bits(tmp_path):
+    """Test that ints orjson cannot encode are still written, via the stdlib encoder"""
+    filepath = str(tmp_path / "ids.json")
+    data = {"id": 2 ** 70, "ids": [-(2 ** 65), 1]}
+
+    save_json(data, filepath)
+
+    assert load_json(filepath) == data
+
+def test_save_json_failed_write_keeps_previous_file(tmp_path, monkeypatch):
+    """Test that a failed write leaves no temporary file and keeps the old contents"""
+    filepath = tmp_path / "content_list.json"
+    save_json({"version": 1}, str(filepath))
+
+    def failing_write_all(fd, data):
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+
+    monkeypatch.setattr("src.utils._write_all", failing_write_all)
+    with pytest.raises(OSError):
+        save_json({"version": 2}, str(filepath))
+
+    assert load_json(str(filepath)) == {"version": 1}
+    assert [p.name for p in tmp_path.iterdir()] == ["content_list.json"]
+
+def test_save_json_durable_fsyncs_file_and_directory(tmp_path, monkeypatch):
+    """Test that durable=True fsyncs the data and, on POSIX, the parent directory"""
+    synced = []
+    real_fsync = os.fsync
+
+    def recording_fsync(fd):
+        synced.append(stat.S_ISDIR(os.fstat(fd).st_mode))
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", recording_fsync)
+    filepath = tmp_path / "content_list.json"
+    save_json({"version": 1}, str(filepath), durable=True)
+
+    assert load_json(str(filepath)) == {"version": 1}
+    assert synced == ([False, True] if os.name == "posix" else [False])
+
+def test_save_json_many_roundtrip(tmp_path):
+    """Test that save_json_many writes every (data, filepath) pair"""
+    items = [({"page": k, "text": f"Page {k}"}, str(tmp_path / f"page_{k}.json")) for k in range(10)]
+
+    save_json_many(items, max_workers=4)
+
+    for data, filepath in items:
+        assert load_json(filepath) == data
+
+def test_save_json_many_reraises_and_writes_the_rest(tmp_path):
+    """Test that one failing path re-raises while the other files are still written"""
+    good = [({"k": k}, str(tmp_path / f"good_{k}.json")) for k in range(5)]
+    bad = ({"k": "bad"}, str(tmp_path / "missing" / "bad.json"))
+
+    with pytest.raises(FileNotFoundError):
+        save_json_many([bad] + good)
+
+    for data, filepath in good:
+        assert load_json(filepath) == data
+    assert not (tmp_path / "missing").exists()
+
+def test_load_json_stream_yields_items(tmp_path):
+    """Test that streaming a JSON array yields the same items as a full load"""
+    items = [{"type": "text", "text": "Tóm tắt"}, {"type": "image", "img_path": "images/a.jpg"}]
+    filepath = str(tmp_path / "content_list.json")
+    save_json(items, filepath)
+
+    assert list(load_json(filepath, stream=True)) == items
+
+@pytest.mark.parametrize("use_ijson", [True, False])
+def test_load_json_stream_rejects_non_array(tmp_path, monkeypatch, use_ijson):
+    """Test that streaming a non-array file raises with or without ijson"""
+    if use_ijson:
+        pytest.importorskip("ijson")
+    else:
+        monkeypatch.setattr("src.utils.ijson", None)
+    filepath = str(tmp_path / "content_list.json")
+    save_json({"type": "text"}, filepath)
+
+    with pytest.raises(ValueError):
+        load_json(filepath, stream=True)
+
+@pytest.mark.parametrize("use_ijson", [True, False])
+@pytest.mark.parametrize("content", [b"", b'[{"type": "text"}, {"type"'])
+def test_load_json_stream_invalid_json_raises_value_error(tmp_path, monkeypatch, use_ijson, content):
+    """Test that an empty or truncated file raises ValueError with or without ijson"""
+    if use_ijson:
+        pytest.importorskip("ijson")
+    else:
+        monkeypatch.setattr("src.utils.ijson", None)
+    filepath = tmp_path / "content_list.json"
+    filepath.write_bytes(content)
+
+    with pytest.raises(ValueError):
+        list(load_json(str(filepath), stream=True))
+
+@pytest.mark.parametrize("filename", ["chunks.msgpack", "chunks.msgpack.zst"])
+def test_save_and_load_binary_roundtrip(tmp_path, filename):
+    """Test that MessagePack sidecars, plain or compressed, are read back unchanged"""
+    pytest.importorskip("msgpack")
+    if filename.endswith(".zst"):
+        pytest.importorskip("zstandard")
+    data = {"chunks": ["Giới thiệu", "Method"], "page": 3, 7: b"\x00\x01"}
+    filepath = str(tmp_path / filename)
+
+    save_binary(data, filepath)
+
+    assert load_binary(filepath) == data
+
+def test_ensure_directory_exists_after_external_removal(tmp_path):
+    """Test that a directory removed outside this module is created again"""
+    filepath = str(tmp_path / "output" / "slides.pptx")
+    ensure_directory_exists(filepath)
+    shutil.rmtree(str(tmp_path / "output"))
+
+    ensure_directory_exists(filepath)
+
+    assert (tmp_path / "output").is_dir()
+
+def test_clean_directory_keeps_root(tmp_path):
+    """Test that clean_directory empties a directory without removing it"""
+    root = tmp_path / "processed"
+    (root / "nested" / "deeper").mkdir(parents=True)
+    (root / "chunk.json").write_text("{}")
+    (root / "nested" / "deeper" / "page.png").write_bytes(b"png")
+    os.symlink(str(tmp_path), str(root / "link"))
+
+    clean_directory(str(root))
+
+    assert root.is_dir()
+    assert list(root.iterdir()) == []
+    assert tmp_path.is_dir()
+
+    not_a_dir = tmp_path / "notes.txt"
+    not_a_dir.write_text("keep")
+    with pytest.raises(NotADirectoryError):
+        clean_directory(str(not_a_dir))
+    assert not_a_dir.read_text() == "keep"
+
+    (root / "kept.json").write_text("{}")
+    link = tmp_path / "processed-link"
+    os.symlink(str(root), str(link))
+    with pytest.raises(NotADirectoryError):
+        clean_directory(str(link))
+    assert (root / "kept.json").exists()
+
+def _write_source(tmp_path, size=3 * 1024 * 1024 + 17):
+    """Write a source file with non-repeating content, an unusual mode and an old mtime"""
+    source = tmp_path / "src.bin"
+    source.write_bytes(os.urandom(size))
+    os.chmod(str(source), 0o640)
+    os.utime(str(source), (1_000_000_000, 1_000_000_000))
+    return source
+
+def test_copy_file_preserves_content_and_metadata(tmp_path):
+    """Test that copy_file copies bytes, mode and mtime like shutil.copy2"""
+    source = _write_source(tmp_path)
+    dest = tmp_path / "out" / "dst.bin"
+
+    copy_file(str(source), str(dest))
+
+    assert dest.read_bytes() == source.read_bytes()
+    assert dest.stat().st_mode == source.stat().st_mode
+    assert dest.stat().st_mtime == source.stat().st_mtime
+
+def test_copy_file_into_directory(tmp_path):
+    """Test that copying onto a directory places the file inside it"""
+    source = _write_source(tmp_path, size=100)
+    target_dir = tmp_path / "images"
+    target_dir.mkdir()
+
+    copy_file(str(source), str(target_dir))
+
+    assert (target_dir / "src.bin").read_bytes() == source.read_bytes()
+
+def test_copy_file_same_file(tmp_path):
+    """Test that copying a file onto itself raises SameFileError and keeps the data"""
+    source = _write_source(tmp_path, size=100)
+    data = source.read_bytes()
+
+    with pytest.raises(shutil.SameFileError):
+        copy_file(str(source), str(source))
+
+    assert source.read_bytes() == data
+
+def test_copy_file_rejects_non_regular_source_before_truncating(tmp_path):
+    """Test that a directory or FIFO source is rejected and leaves dst untouched"""
+    dest = tmp_path / "existing.txt"
+    dest.write_text("keep")
+    source_dir = tmp_path / "somedir"
+    source_dir.mkdir()
+
+    with pytest.raises(IsADirectoryError):
+        copy_file(str(source_dir), str(dest))
+    assert dest.read_text() == "keep"
+
+    if hasattr(os, "mkfifo"):
+        fifo = tmp_path / "pipe"
+        os.mkfifo(str(fifo))
+        with pytest.raises(shutil.SpecialFileError):
+            copy_file(str(fifo), str(dest))
+        assert dest.read_text() == "keep"
+
+def test_copy_file_falls_back_when_copy_file_range_copies_nothing(tmp_path, monkeypatch):
+    """Test that copy_file_range returning 0 at offset 0 is not taken as EOF"""
+    if not hasattr(os, "copy_file_range"):
+        pytest.skip("os.copy_file_range not available")
+    source = _write_source(tmp_path)
+    dest = tmp_path / "dst.bin"
+
+    monkeypatch.setattr("src.utils._FICLONE", None)
+    monkeypatch.setattr(os, "copy_file_range", lambda *args: 0)
+
+    copy_file(str(source), str(dest))
+
+    assert dest.read_bytes() == source.read_bytes()
+
+@pytest.mark.parametrize("has_sendfile", [True, False])
+def test_copy_file_resumes_after_copy_file_range_fails(tmp_path, monkeypatch, has_sendfile):
+    """Test that the fallback copy continues where copy_file_range stopped"""
+    if not hasattr(os, "copy_file_range"):
+        pytest.skip("os.copy_file_range not available")
+    source = _write_source(tmp_path)
+    dest = tmp_path / "dst.bin"
+    real_copy_file_range = os.copy_file_range
+    offsets = []
+
+    def copy_one_block(src_fd, dst_fd, count, offset_src=None, *args):
+        offsets.append(offset_src)
+        if len(offsets) > 1:
+            raise OSError(errno.EXDEV, os.strerror(errno.EXDEV))
+        return real_copy_file_range(src_fd, dst_fd, 4096, offset_src, *args)
+
+    monkeypatch.setattr("src.utils._FICLONE", None)
+    monkeypatch.setattr(os, "copy_file_range", copy_one_block)
+    if not has_sendfile:
+        monkeypatch.delattr(os, "sendfile", raising=False)
+
+    copy_file(str(source), str(dest))
+
+    assert offsets == [0, 4096]
+    assert dest.read_bytes() == source.read_bytes()
+
+def test_copy_files_creates_destination_directories(tmp_path, monkeypatch):
+    """Test that copy_files creates missing directories and accepts a bare-filename dst"""
+    monkeypatch.chdir(tmp_path)
+    sources = []
+    for k in range(3):
+        source = tmp_path / f"src_{k}.bin"
+        source.write_bytes(os.urandom(100 + k))
+        sources.append(source)
+    pairs = [
+        (str(sources[0]), str(tmp_path / "out" / "images" / "a.bin")),
+        (str(sources[1]), str(tmp_path / "out" / "images" / "b.bin")),
+        (str(sources[2]), str(tmp_path / "out" / "tables" / "c.bin")),
+        (str(sources[0]), "bare.bin"),
+    ]
+
+    copy_files(pairs)
+
+    for src, dst in pairs:
+        assert (tmp_path / dst).read_bytes() == Path(src).read_bytes()
+
+@pytest.mark.parametrize("clone_errno", [errno.EOPNOTSUPP, errno.EIO])
+def test_copy_file_clone_failure(tmp_path, monkeypatch, clone_errno):
+    """Test that an unsupported clone falls back to copying and other errors propagate"""
+    pytest.importorskip("fcntl")
+    source = _write_source(tmp_path)
+    dest = tmp_path / "dst.bin"
+    requests = []
+
+    def failing_ioctl(fd, request, arg=0):
+        requests.append(request)
+        raise OSError(clone_errno, os.strerror(clone_errno))
+
+    monkeypatch.setattr("src.utils._FICLONE", 0x40049409)
+    monkeypatch.setattr("src.utils.fcntl.ioctl", failing_ioctl)
+
+    if clone_errno == errno.EIO:
+        with pytest.raises(OSError) as excinfo:
+            copy_file(str(source), str(dest))
+        assert excinfo.value.errno == errno.EIO
+    else:
+        copy_file(str(source), str(dest))
+        assert dest.read_bytes() == source.read_bytes()
+    assert requests == [0x40049409]
+
 # Add more tests as needed 
\ No newline at end of file